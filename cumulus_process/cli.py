@@ -24,6 +24,7 @@ def parse_args(cls, args):
                          help='0:all, 1:debug, 2:info, 3:warning, 4:error, 5:critical')
 
     subparsers = parser0.add_subparsers(dest='command')
+    subparsers.required = True
 
     parser = subparsers.add_parser('process', parents=[pparser], help='Process local files', formatter_class=dhf)
     parser.add_argument('input', nargs='*', default=[])
@@ -90,6 +91,3 @@ def cli(cls):
     # run as a service
     elif cmd == 'activity':
         cls.cumulus_activity(args['arn'])
-
-    else:
-        logger.error('Unknown command %s (choose between: process, payload, activity)' % cmd)
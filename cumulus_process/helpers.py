@@ -2,7 +2,7 @@ import os
 import gzip
 from dicttoxml import dicttoxml
 from xml.dom.minidom import parseString
-from cumulus_process.s3 import download, upload
+from cumulus_process.s3 import build_uri, download, upload_many
 
 
 def upload_files(files, bucket, prefix):
@@ -16,11 +16,8 @@ def upload_files(files, bucket, prefix):
     Returns:
         returns a list of s3 uris e.g. s3://example-bucket/my/prefix/filename.txt
     """
-    list_of_uris = []
-    for f in files:
-        s3_uri = os.path.join('s3://', bucket, prefix, os.path.basename(f))
-        list_of_uris.append(upload(f, s3_uri))
-    return list_of_uris
+    pairs = [(f, build_uri(bucket, prefix, os.path.basename(f))) for f in files]
+    return upload_many(pairs)
 
 
 def dict_to_xml(meta, pretty=False, root='Granule'):
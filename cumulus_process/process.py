@@ -9,7 +9,7 @@ from shutil import rmtree
 from tempfile import mkdtemp
 from dicttoxml import dicttoxml
 from xml.dom.minidom import parseString
-from cumulus_process.s3 import download, upload
+from cumulus_process.s3 import build_uri, download_many, upload, uri_parser
 from cumulus_process.loggers import getLogger
 from cumulus_process.cli import cli
 from cumulus_process.handlers import activity
@@ -102,18 +102,15 @@ class Process(object):
         regex = self.input_keys.get(key, None)
         if regex is None:
             raise Exception('No files matching %s' % regex)
-        outfiles = []
-        for f in self.input:
-            m = re.match(regex, os.path.basename(f))
-            if m is not None:
-                # if remote desired, or input is already local
-                if remote or os.path.exists(f):
-                    outfiles.append(f)
-                else:
-                    fname = download(f, path=self.path)
-                    outfiles.append(fname)
-                    self.downloads.append(fname)
-        return outfiles
+        matches = [f for f in self.input if re.match(regex, os.path.basename(f)) is not None]
+        # if remote desired, or input is already local, there is nothing to download
+        fnames = {f: os.path.join(self.path, uri_parser(f)['filename'])
+                  for f in matches if not (remote or os.path.exists(f))}
+        # download each local file once; as when downloading one at a time, the last uri wins
+        targets = {fnames[f]: f for f in matches if f in fnames}
+        if targets:
+            download_many(list(targets.values()), path=self.path, callback=self.downloads.append)
+        return [fnames.get(f, f) for f in matches]
 
     def fetch_all(self, remote=False):
         """ Download all files in remote_in """
@@ -227,9 +224,10 @@ class Process(object):
                     prefix = f.get('fileStagingDir', self.config.get('fileStagingDir', ''))
                     if prefix is None:
                         prefix = f.get('url_path', self.config.get('url_path', ''))
-                    s3_url = os.path.join('s3://', bucket['name'], prefix, os.path.basename(filename))
+                    s3_url = build_uri(bucket['name'], prefix, os.path.basename(filename))
                     http_url = 'http://%s.s3.amazonaws.com' % bucket['name'] if bucket['type'] == 'public' else self.default_url
-                    http_url = os.path.join(http_url, prefix, os.path.basename(filename))
+                    parts = [http_url, prefix, os.path.basename(filename)]
+                    http_url = '/'.join(p.strip('/') for p in parts if p and p.strip('/'))
                     info.update({'s3': s3_url, 'http': http_url})
         if (count) > 1:
             raise Exception('More than one regex matches %s' % filename)
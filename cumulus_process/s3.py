@@ -1,15 +1,80 @@
 #!/usr/bin/env python
 
+import io
 import os
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.client import Config
+from botocore.exceptions import ClientError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# connections kept open per client, shared by all transfer threads
+POOL_SIZE = int(os.getenv('S3_POOL', '50'))
+
+# parallel parts per transfer, and files per batch in download_many/upload_many
+CONCURRENCY = int(os.getenv('S3_CONCURRENCY', '16'))
+
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+
+# wider connection pool and keepalive so concurrent transfers reuse sockets
+CLIENT_CONFIG = Config(
+    max_pool_connections=POOL_SIZE,
+    tcp_keepalive=True,
+    retries={'mode': 'standard', 'max_attempts': 5}
+)
+
+# botocore only reads AWS_DEFAULT_REGION, while Lambda and other runtimes may only set AWS_REGION
+REGION = os.getenv('AWS_REGION') or os.getenv('AWS_DEFAULT_REGION')
+
+
+def _transfer_config(max_concurrency):
+    """ parallel multipart uploads and ranged downloads for large files """
+    return TransferConfig(
+        multipart_threshold=MULTIPART_THRESHOLD,
+        multipart_chunksize=MULTIPART_CHUNKSIZE,
+        max_concurrency=max_concurrency,
+        use_threads=True
+    )
+
+
+TRANSFER_CONFIG = _transfer_config(CONCURRENCY)
+
+# boto3 clients are thread-safe, but creating them from the default session is not
+_clients = {}
+_clients_lock = threading.Lock()
+
 
 def get_client(client='s3'):
+    """ return a boto3 (aws) client, one shared instance per service """
+    try:
+        return _clients[client]
+    except KeyError:
+        pass
+    with _clients_lock:
+        if client not in _clients:
+            _clients[client] = _create_client(client)
+        return _clients[client]
+
+
+def _create_client(client):
     """ creates and return a boto3 (aws) client """
+    kwargs = localstack_kwargs(client) or {'region_name': REGION}
+    return boto3.client(client, config=CLIENT_CONFIG, **kwargs)
+
+
+def localstack_kwargs(client):
+    """ client keyword arguments pointing to localstack, if LOCALSTACK_HOST is set """
     local_stack_ports = { 
         'apigateway': 4567,
         'cloudformation': 4581,
@@ -32,49 +97,55 @@ def get_client(client='s3'):
 
     localstack = os.getenv('LOCALSTACK_HOST')
     if localstack:
-        return boto3.client(
-            client,
-            region_name='us-east-1',
-            endpoint_url='http://%s:%s' % (localstack, local_stack_ports[client]),
-            use_ssl=False,
-            aws_access_key_id='fake-key',
-            aws_secret_access_key='fake-secret'
-        )
+        return {
+            'region_name': 'us-east-1',
+            'endpoint_url': 'http://%s:%s' % (localstack, local_stack_ports[client]),
+            'use_ssl': False,
+            'aws_access_key_id': 'fake-key',
+            'aws_secret_access_key': 'fake-secret'
+        }
 
-    return boto3.client(client)
+    return {}
 
 
 def uri_parser(uri):
     """ Split S3 URI into bucket, key, filename """
-    if uri[0:5] != 's3://':
-        raise Exception('Invalid S3 uri %s' % uri)
+    if not uri.startswith('s3://'):
+        raise ValueError('Invalid S3 uri %s' % uri)
 
-    uri_obj = uri.replace('s3://', '').split('/')
+    bucket, _, key = uri[5:].partition('/')
 
     # remove empty items
-    uri_obj = list(filter(lambda x: x, uri_obj))
+    if '//' in key or key.startswith('/') or key.endswith('/'):
+        key = '/'.join(k for k in key.split('/') if k)
 
     return {
-        'bucket': uri_obj[0],
-        'key': '/'.join(uri_obj[1:]),
-        'filename': uri_obj[-1]
+        'bucket': bucket,
+        'key': key,
+        'filename': key.rpartition('/')[2] or bucket
     }
 
 
+def build_uri(bucket, *parts):
+    """ Join bucket and key parts into an S3 URI, skipping empty parts """
+    key = '/'.join(p.strip('/') for p in parts if p and p.strip('/'))
+    return 's3://%s/%s' % (bucket, key)
+
+
 def mkdirp(path):
     """ Recursively make directory """
-    if not os.path.isdir(path):
-        os.makedirs(path)
+    if path:
+        # exist_ok avoids a separate stat and is safe when threads race to create path
+        os.makedirs(path, exist_ok=True)
     return path
 
 
-def download(uri, path=''):
+def download(uri, path='', config=TRANSFER_CONFIG):
     """ Download object from S3 """
     s3_uri = uri_parser(uri)
     fout = os.path.join(path, s3_uri['filename'])
-    logger.debug("Downloading %s as %s" % (uri, fout))
-    if path != '':
-        mkdirp(path)
+    logger.debug("Downloading %s as %s", uri, fout)
+    mkdirp(path)
 
     s3 = get_client()
 
@@ -82,68 +153,158 @@ def download(uri, path=''):
         s3.download_fileobj(
             Bucket=s3_uri['bucket'],
             Key=s3_uri['key'],
-            Fileobj=f
+            Fileobj=f,
+            Config=config
         )
     return fout
 
 
-def download_json(uri):
-    """ Download object from S3 as JSON """
-    logger.debug("Downloading %s as JSON" % (uri))
+def download_many(uris, path='', concurrency=CONCURRENCY, callback=None):
+    """ Download multiple objects from S3 in parallel, returning local filenames in order
+
+    If given, callback is called with each local filename as soon as its download completes
+    """
+    config = _batch_transfer_config(concurrency)
+
+    def _download(uri):
+        fout = download(uri, path=path, config=config)
+        if callback is not None:
+            callback(fout)
+        return fout
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(_download, uris))
+
+
+def download_bytes(uri):
+    """ Download object from S3 into memory, without writing a local file """
+    logger.debug("Downloading %s into memory", uri)
     s3 = get_client()
     s3_uri = uri_parser(uri)
     response = s3.get_object(Bucket=s3_uri['bucket'], Key=s3_uri['key'])
-    return json.loads(response['Body'].read().decode())
+    if response['ContentLength'] <= MULTIPART_THRESHOLD:
+        return response['Body'].read()
+
+    # large objects are fetched again as parallel ranged requests
+    response['Body'].close()
+    buf = io.BytesIO()
+    s3.download_fileobj(
+        Bucket=s3_uri['bucket'],
+        Key=s3_uri['key'],
+        Fileobj=buf,
+        Config=TRANSFER_CONFIG
+    )
+    return buf.getvalue()
+
+
+def _loads(data):
+    """ Parse JSON bytes, with orjson when it is installed """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN, Infinity and integers wider than 64 bits, which json accepts
+            pass
+    # json accepts bytes directly, skipping a decoded copy of the whole body
+    return json.loads(data)
 
 
-def upload(filename, uri, extra={}):
+def download_json(uri):
+    """ Download object from S3 as JSON """
+    return _loads(download_bytes(uri))
+
+
+def upload(filename, uri, extra={}, config=TRANSFER_CONFIG):
     """ Upload object to S3 uri (bucket + prefix), keeping same base filename """
-    logger.debug("Uploading %s to %s" % (filename, uri))
+    logger.debug("Uploading %s to %s", filename, uri)
     s3 = get_client()
     s3_uri = uri_parser(uri)
-    uri_out = 's3://%s' % os.path.join(s3_uri['bucket'], s3_uri['key'])
+    uri_out = 's3://%s/%s' % (s3_uri['bucket'], s3_uri['key'])
     with open(filename, 'rb') as data:
-        s3.upload_fileobj(data, s3_uri['bucket'], s3_uri['key'], ExtraArgs=extra)
+        s3.upload_fileobj(data, s3_uri['bucket'], s3_uri['key'], ExtraArgs=extra,
+                         Config=config)
     return uri_out
 
 
-def list_objects(uri):
-    """ Get list of objects within bucket and path """
-    logger.debug("Listing contents of %s" % uri)
+def upload_many(pairs, extra={}, concurrency=CONCURRENCY):
+    """ Upload multiple (filename, uri) pairs to S3 in parallel, returning uris in order """
+    config = _batch_transfer_config(concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda p: upload(p[0], p[1], extra=extra, config=config), pairs))
+
+
+def _batch_transfer_config(concurrency):
+    """ split the connection pool between files transferred in parallel, so threads don't outnumber connections """
+    return _transfer_config(max(1, min(CONCURRENCY, POOL_SIZE // concurrency)))
+
+
+def iter_objects(uri, page_size=None):
+    """ Iterate over objects within bucket and path, fetching one page at a time """
+    logger.debug("Listing contents of %s", uri)
     s3 = get_client()
     s3_uri = uri_parser(uri)
-    response = s3.list_objects_v2(Bucket=s3_uri['bucket'], Prefix=s3_uri['key'])
+    paginator = s3.get_paginator('list_objects_v2')
+    pagination = {'PageSize': page_size} if page_size else {}
+    for page in paginator.paginate(Bucket=s3_uri['bucket'], Prefix=s3_uri['key'], PaginationConfig=pagination):
+        for file in page.get('Contents', []):
+            yield 's3://%s/%s' % (s3_uri['bucket'], file['Key'])
 
-    filenames = []
-    if 'Contents' in response.keys():
-        for file in response['Contents']:
-            filenames.append(os.path.join('s3://%s' % s3_uri['bucket'], file['Key']))
-    return filenames
+
+def list_objects(uri, page_size=None):
+    """ Get list of objects within bucket and path """
+    return list(iter_objects(uri, page_size=page_size))
 
 
 def delete(uri):
     """ Remove an item from S3 """
-    logger.debug('Deleting %s' % uri)
+    return delete_many([uri])[0]
+
+
+def delete_many(uris):
+    """ Remove items from S3, up to 1000 keys per request, returning success for each uri """
+    uris = list(uris)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Deleting %s', ', '.join(uris))
     s3 = get_client()
-    s3_uri = uri_parser(uri)
-    # TODO - parse response and return success/failure
-    try:
-        res = s3.delete_object(Bucket=s3_uri['bucket'], Key=s3_uri['key'])
-        return True
-    except Exception as e:
-        return False
+    # group keys by bucket, keeping track of where each uri came from
+    buckets = {}
+    for i, uri in enumerate(uris):
+        s3_uri = uri_parser(uri)
+        buckets.setdefault(s3_uri['bucket'], []).append((i, s3_uri['key']))
+
+    success = [True] * len(uris)
+    for bucket, keys in buckets.items():
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start:start + 1000]
+            try:
+                res = s3.delete_objects(
+                    Bucket=bucket,
+                    Delete={'Objects': [{'Key': key} for _, key in chunk], 'Quiet': True}
+                )
+            except ClientError as e:
+                logger.error('Error deleting %s objects from %s: %s', len(chunk), bucket, e)
+                for i, _ in chunk:
+                    success[i] = False
+                continue
+            failed = set(err['Key'] for err in res.get('Errors', []))
+            if failed:
+                logger.error('Error deleting from %s: %s', bucket, ', '.join(sorted(failed)))
+            for i, key in chunk:
+                if key in failed:
+                    success[i] = False
+    return success
 
 
 def exists(uri):
     """ Check if this URI exists on S3 """
-    logger.debug('Checking existence of %s' % uri)
+    logger.debug('Checking existence of %s', uri)
     s3 = get_client()
     s3_uri = uri_parser(uri)
     try:
-        s3.get_object(Bucket=s3_uri['bucket'], Key=s3_uri['key'])
+        s3.head_object(Bucket=s3_uri['bucket'], Key=s3_uri['key'])
         return True
-    except Exception as e:
-        if e.response['Error']['Code'] == 'NoSuchKey':
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
             return False
         else:
             raise
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+asyncio versions of the s3 helpers, requires aiobotocore (pip install cumulus_process[async])
+
+Clients stay open for the life of their event loop; await close_clients() before the loop is closed.
+File reads and writes run in the loop's default executor so they don't block the event loop.
+"""
+
+import os
+import asyncio
+import logging
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
+from cumulus_process.s3 import (CONCURRENCY, MULTIPART_CHUNKSIZE, MULTIPART_THRESHOLD, POOL_SIZE, REGION,
+                                localstack_kwargs, mkdirp, uri_parser)
+
+logger = logging.getLogger(__name__)
+
+CLIENT_CONFIG = AioConfig(
+    max_pool_connections=POOL_SIZE,
+    retries={'mode': 'standard', 'max_attempts': 5}
+)
+
+# size of the chunks read from the response body when downloading
+CHUNK_SIZE = 1024 * 1024
+
+# most parts S3 accepts in a multipart upload
+MAX_PARTS = 10000
+
+# one long-lived client per event loop and service, kept until close_clients() is awaited
+_clients = {}
+
+
+async def get_client(client='s3'):
+    """ return an aiobotocore client, one shared instance per event loop and service """
+    clients = _clients.setdefault(asyncio.get_event_loop(), {})
+    task = clients.get(client)
+    if task is None:
+        task = clients[client] = asyncio.ensure_future(_create_client(client))
+    try:
+        # shielded so a cancelled caller doesn't cancel creation for everyone sharing the task
+        return await asyncio.shield(task)
+    except BaseException:
+        # drop failed creations so the next call retries
+        if task.done() and (task.cancelled() or task.exception() is not None) and clients.get(client) is task:
+            clients.pop(client)
+        raise
+
+
+async def _create_client(client):
+    """ creates and return an aiobotocore client """
+    kwargs = localstack_kwargs(client) or {'region_name': REGION}
+    creator = get_session().create_client(client, config=CLIENT_CONFIG, **kwargs)
+    return await creator.__aenter__()
+
+
+async def close_clients():
+    """ Close all clients opened for the running event loop """
+    clients = _clients.pop(asyncio.get_event_loop(), {})
+    results = await asyncio.gather(*clients.values(), return_exceptions=True)
+    opened = [c for c in results if not isinstance(c, BaseException)]
+    errors = await asyncio.gather(*[c.close() for c in opened], return_exceptions=True)
+    for error in errors:
+        if isinstance(error, BaseException):
+            logger.warning('Error closing client: %s', error)
+
+
+async def aio_download(uri, path=''):
+    """ Download object from S3 """
+    s3_uri = uri_parser(uri)
+    fout = os.path.join(path, s3_uri['filename'])
+    logger.debug("Downloading %s as %s", uri, fout)
+    mkdirp(path)
+
+    s3 = await get_client()
+    loop = asyncio.get_event_loop()
+
+    response = await s3.get_object(Bucket=s3_uri['bucket'], Key=s3_uri['key'])
+    async with response['Body'] as body:
+        with open(fout, 'wb') as f:
+            while True:
+                chunk = await body.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                await loop.run_in_executor(None, f.write, chunk)
+    return fout
+
+
+async def aio_download_many(uris, path=''):
+    """ Download multiple objects from S3 concurrently, returning local filenames in order """
+    return await asyncio.gather(*[aio_download(uri, path=path) for uri in uris])
+
+
+async def aio_upload(filename, uri, extra={}):
+    """ Upload object to S3 uri (bucket + prefix), keeping same base filename """
+    logger.debug("Uploading %s to %s", filename, uri)
+    s3 = await get_client()
+    s3_uri = uri_parser(uri)
+    uri_out = 's3://%s/%s' % (s3_uri['bucket'], s3_uri['key'])
+    if os.path.getsize(filename) > MULTIPART_THRESHOLD:
+        await _multipart_upload(s3, filename, s3_uri['bucket'], s3_uri['key'], extra)
+    else:
+        data = await asyncio.get_event_loop().run_in_executor(None, _read, filename)
+        await s3.put_object(Bucket=s3_uri['bucket'], Key=s3_uri['key'], Body=data, **extra)
+    return uri_out
+
+
+async def _multipart_upload(s3, filename, bucket, key, extra):
+    """ Upload a large file in parts, up to CONCURRENCY parts at a time """
+    size = os.path.getsize(filename)
+    # grow the parts for very large files to stay within the S3 part limit
+    part_size = max(MULTIPART_CHUNKSIZE, -(-size // MAX_PARTS))
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    upload_id = (await s3.create_multipart_upload(Bucket=bucket, Key=key, **extra))['UploadId']
+
+    async def upload_part(number, offset):
+        async with semaphore:
+            data = await loop.run_in_executor(None, _read, filename, offset, part_size)
+            res = await s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data)
+        return {'PartNumber': number, 'ETag': res['ETag']}
+
+    tasks = [asyncio.ensure_future(upload_part(i + 1, offset))
+             for i, offset in enumerate(range(0, size, part_size))]
+    try:
+        parts = await asyncio.gather(*tasks)
+        await s3.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                           MultipartUpload={'Parts': parts})
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+
+
+def _read(filename, offset=0, size=-1):
+    """ Read size bytes from offset, or the rest of the file """
+    with open(filename, 'rb') as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+async def aio_exists(uri):
+    """ Check if this URI exists on S3 """
+    logger.debug('Checking existence of %s', uri)
+    s3 = await get_client()
+    s3_uri = uri_parser(uri)
+    try:
+        await s3.head_object(Bucket=s3_uri['bucket'], Key=s3_uri['key'])
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        else:
+            raise
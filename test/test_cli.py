@@ -28,8 +28,8 @@ class Test(unittest.TestCase):
             fouts[out] = fout
         return fouts
 
-    def _test_parse_no_args(self):
-        """ Parse arguments for CLI to a Granule class, this test fails in Python3 """
+    def test_parse_no_args(self):
+        """ Parse arguments for CLI to a Granule class without a command """
         with self.assertRaises(SystemExit) as context:
             parse_args(Process, '')
 
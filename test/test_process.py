@@ -119,6 +119,25 @@ class Test(unittest.TestCase):
             assert process.has_default_keys
 
     @patch.object(Process, 'process', fake_process)
+    def test_fetch_shared_basename(self):
+        """ Download inputs sharing a local filename once, recording downloads that completed """
+        path = mkdtemp()
+        inputs = ['s3://bucket/a/input-1.txt', 's3://bucket/b/input-1.txt', 's3://bucket/input-2.txt']
+        process = Process(inputs, path=path, config={'input_keys': {'input': r'^input-.*\.txt$'}})
+        downloaded = []
+
+        def fake_download(uri, path='', config=None):
+            if uri.endswith('input-2.txt'):
+                raise Exception('download failed')
+            downloaded.append(uri)
+            return os.path.join(path, os.path.basename(uri))
+
+        with patch.object(s3, 'download', fake_download):
+            with self.assertRaises(Exception):
+                process.fetch('input')
+        self.assertEqual(downloaded, ['s3://bucket/b/input-1.txt'])
+        self.assertEqual(process.downloads, [os.path.join(path, 'input-1.txt')])
+
     def test_upload(self):
         """ Upload output files """
         process = self.get_test_process()
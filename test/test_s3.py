@@ -3,6 +3,8 @@ import uuid
 import json
 import unittest
 import logging
+from mock import patch, MagicMock
+from botocore.exceptions import ClientError
 from cumulus_process import s3
 
 # quiet these loggers
@@ -41,6 +43,26 @@ class Test(unittest.TestCase):
         self.assertEqual(s3_obj['key'], 'test/file.txt')
         self.assertEqual(s3_obj['filename'], 'file.txt')
 
+    def test_uri_parser_empty_segments(self):
+        """ Parse S3 URI with repeated and trailing slashes """
+        s3_obj = s3.uri_parser('s3://%s//test//file.txt/' % self.bucket)
+        self.assertEqual(s3_obj['key'], 'test/file.txt')
+        self.assertEqual(s3_obj['filename'], 'file.txt')
+
+    def test_build_uri(self):
+        """ Build S3 URI from bucket, prefix and filename """
+        self.assertEqual(s3.build_uri(self.bucket, '', 'file.txt'), 's3://%s/file.txt' % self.bucket)
+        self.assertEqual(s3.build_uri(self.bucket, '/a/b/', 'file.txt'), 's3://%s/a/b/file.txt' % self.bucket)
+
+    def test_uri_parser_invalid(self):
+        """ Reject URIs that are not on S3 """
+        with self.assertRaises(ValueError):
+            s3.uri_parser('http://%s/file.txt' % self.bucket)
+
+    def test_get_client_cached(self):
+        """ Reuse the same client for a given service """
+        self.assertIs(s3.get_client(), s3.get_client('s3'))
+
     def test_exists_true(self):
         """ Check for existence of object that exists """
 
@@ -58,6 +80,15 @@ class Test(unittest.TestCase):
         uris = s3.list_objects(os.path.join(self.s3path, 'nosuchkey'))
         self.assertEqual(len(uris), 0)
 
+    def test_list_paginated(self):
+        """ Get list of objects spanning several pages """
+        uris = [self.s3path + '/list/file-%s.txt' % i for i in range(3)]
+        for uri in uris:
+            s3.upload(self.payload, uri)
+        self.assertEqual(s3.list_objects(self.s3path + '/list', page_size=2), uris)
+        for uri in uris:
+            s3.delete(uri)
+
     def test_upload(self):
         """ Upload file to S3 then delete """
         filename = os.path.basename(__file__)
@@ -77,6 +108,67 @@ class Test(unittest.TestCase):
         s3.delete(uri)
         os.remove(fout)
 
+    def test_upload_download_many(self):
+        """ Upload and download several files in parallel """
+        pairs = [(self.payload, self.s3path + '/many-%s.json' % i) for i in range(3)]
+        uris = s3.upload_many(pairs)
+        self.assertEqual(uris, [p[1] for p in pairs])
+        fouts = s3.download_many(uris, path=self.path)
+        self.assertEqual(fouts, [os.path.join(self.path, 'many-%s.json' % i) for i in range(3)])
+        for uri, fout in zip(uris, fouts):
+            s3.delete(uri)
+            os.remove(fout)
+
+    def test_delete_many(self):
+        """ Delete several objects in one request """
+        uris = [self.s3path + '/delete/file-%s.txt' % i for i in range(3)]
+        for uri in uris:
+            s3.upload(self.payload, uri)
+        self.assertEqual(s3.delete_many(uris), [True] * 3)
+        self.assertEqual(s3.list_objects(self.s3path + '/delete'), [])
+
+    def test_delete_many_errors(self):
+        """ Map per-key errors, grouping by bucket and splitting into 1000 key requests """
+        client = MagicMock()
+
+        def delete_objects(Bucket, Delete):
+            if Bucket == 'denied':
+                raise ClientError({'Error': {'Code': 'AccessDenied'}}, 'DeleteObjects')
+            return {'Errors': [{'Key': 'key-1', 'Code': 'InternalError'}]}
+        client.delete_objects.side_effect = delete_objects
+
+        uris = ['s3://bucket/key-%s' % i for i in range(1500)] + ['s3://denied/key', 's3://other/key-1']
+        with patch.object(s3, 'get_client', return_value=client):
+            success = s3.delete_many(iter(uris))
+
+        calls = [(c[1]['Bucket'], len(c[1]['Delete']['Objects'])) for c in client.delete_objects.call_args_list]
+        self.assertEqual(sorted(calls), [('bucket', 500), ('bucket', 1000), ('denied', 1), ('other', 1)])
+        failed = [uri for uri, ok in zip(uris, success) if not ok]
+        self.assertEqual(failed, ['s3://bucket/key-1', 's3://denied/key', 's3://other/key-1'])
+
+    def test_download_json_nonstandard(self):
+        """ Download JSON that only the stdlib parser accepts """
+        self.s3.put_object(Bucket=self.bucket, Key='prefix/nan.json', Body='{"nan": NaN, "big": %s}' % 2 ** 70)
+        out = s3.download_json('s3://%s/prefix/nan.json' % self.bucket)
+        self.assertNotEqual(out['nan'], out['nan'])
+        self.assertEqual(out['big'], 2 ** 70)
+        s3.delete('s3://%s/prefix/nan.json' % self.bucket)
+
+    def test_download_bytes(self):
+        """ Download file from S3 into memory """
+        uri = self.s3path + '/bytes.json'
+        s3.upload(self.payload, uri)
+        with open(self.payload, 'rb') as f:
+            self.assertEqual(s3.download_bytes(uri), f.read())
+        s3.delete(uri)
+
+    def test_download_bytes_large(self):
+        """ Download file larger than the multipart threshold into memory """
+        data = os.urandom(s3.MULTIPART_THRESHOLD + 1024)
+        self.s3.put_object(Bucket=self.bucket, Key='prefix/large.bin', Body=data)
+        self.assertEqual(s3.download_bytes('s3://%s/prefix/large.bin' % self.bucket), data)
+        s3.delete('s3://%s/prefix/large.bin' % self.bucket)
+
     def test_download_json(self):
         """ Download file from S3 as JSON """
         json_obj = {
@@ -0,0 +1,81 @@
+import os
+import uuid
+import asyncio
+import unittest
+import logging
+from cumulus_process import s3, s3_async
+
+# quiet these loggers
+logging.getLogger('boto3').setLevel(logging.CRITICAL)
+logging.getLogger('botocore').setLevel(logging.CRITICAL)
+logging.getLogger('nose').setLevel(logging.CRITICAL)
+logging.getLogger('s3transfer').setLevel(logging.CRITICAL)
+
+if not os.getenv('LOCALSTACK_HOST'):
+    raise Exception('LOCALSTACK_HOST must be set as env variable before running tests')
+
+class Test(unittest.TestCase):
+    """ Test asyncio S3 utilities """
+
+    bucket = str(uuid.uuid4())
+    payload = os.path.join(os.path.dirname(__file__), 'payload.json')
+    path = os.path.dirname(__file__)
+    s3path = 's3://%s/test' % bucket
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        s3.get_client().create_bucket(Bucket=cls.bucket)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.run_until_complete(s3_async.close_clients())
+        cls.loop.close()
+        s3.get_client().delete_bucket(Bucket=cls.bucket)
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_get_client_cached(self):
+        """ Reuse the same client within an event loop """
+        client = self.run_async(s3_async.get_client())
+        self.assertIs(self.run_async(s3_async.get_client('s3')), client)
+
+    def test_get_client_cancelled(self):
+        """ Create the client after a caller waiting for it is cancelled """
+        with self.assertRaises(asyncio.TimeoutError):
+            self.run_async(asyncio.wait_for(s3_async.get_client('sqs'), timeout=0))
+        self.assertIsNotNone(self.run_async(s3_async.get_client('sqs')))
+
+    def test_upload_multipart(self):
+        """ Upload a file larger than the multipart threshold """
+        fname = os.path.join(self.path, 'async-large.bin')
+        data = os.urandom(s3.MULTIPART_THRESHOLD + 1024)
+        with open(fname, 'wb') as f:
+            f.write(data)
+        uri = self.s3path + '/async-large.bin'
+        self.assertEqual(self.run_async(s3_async.aio_upload(fname, uri)), uri)
+        self.assertEqual(s3.download_bytes(uri), data)
+        s3.delete(uri)
+        os.remove(fname)
+
+    def test_exists(self):
+        """ Upload a file then check for its existence """
+        uri = self.s3path + '/async-exists.json'
+        self.assertFalse(self.run_async(s3_async.aio_exists(uri)))
+        self.assertEqual(self.run_async(s3_async.aio_upload(self.payload, uri)), uri)
+        self.assertTrue(self.run_async(s3_async.aio_exists(uri)))
+        s3.delete(uri)
+
+    def test_download_many(self):
+        """ Download several files concurrently """
+        uris = [self.s3path + '/async-%s.json' % i for i in range(3)]
+        for uri in uris:
+            s3.upload(self.payload, uri)
+        fouts = self.run_async(s3_async.aio_download_many(uris, path=self.path))
+        self.assertEqual(fouts, [os.path.join(self.path, 'async-%s.json' % i) for i in range(3)])
+        for uri, fout in zip(uris, fouts):
+            with open(fout) as f1, open(self.payload) as f2:
+                self.assertEqual(f1.read(), f2.read())
+            s3.delete(uri)
+            os.remove(fout)